@@ -5,21 +5,97 @@ import time
 import shutil
 import platform
 import json
-import requests
+import socket
+import re
+import tempfile
+import threading
+import sys
 from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
+from appium.webdriver.client_config import AppiumClientConfig
+from selenium.common.exceptions import InvalidSessionIdException
 from appium.options.android import UiAutomator2Options
 from appium.options.ios import XCUITestOptions
 import xml.etree.ElementTree as ET
+try:
+    from lxml import etree as lxml_etree  # Optional, faster C parser with XPath support
+except ImportError:
+    lxml_etree = None
+try:
+    from orjson import loads as json_loads  # Optional, faster JSON parser
+except ImportError:
+    json_loads = json.loads
+import asyncio
 import difflib
+import io
+import functools
+import hashlib
+import http.client
+import shlex
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize the MCP Server
 mcp = FastMCP("UniversalAppiumHelper")
 
-# Global driver
-driver = None
+# Active Appium sessions keyed by session ID, so several devices can be driven at once.
+# _LAST_SESSION is the default for tools called without a session ID.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+_LAST_SESSION = None
+
+# Cached `simctl list devices` JSON and its name -> UDID index. Invalidated after a short
+# TTL or when the CoreSimulator device set changes on disk.
+_SIM_CACHE = {"ts": 0, "key": None, "data": None, "udids": None}
+_SIM_CACHE_TTL = 30
+_SIM_DEVICE_SET = os.path.expanduser("~/Library/Developer/CoreSimulator/Devices/device_set.plist")
+
+# Templates for the Java Page Object generated by `extract_page_locators`.
+_PAGE_CLASS_HEADER = "public class %s {\n\n"
+_ANDROID_LOCATOR_TMPL = '    @AndroidFindBy(id="%s")\n\n    public MobileElement %s;\n\n'
+_IOS_LOCATOR_TMPL = '    @iOSXCUITFindBy(accessibilityId="%s")\n\n    public MobileElement %s;\n\n'
+
+# Page source attributes read by `extract_page_locators` and `heal_locator`
+_LOCATOR_ATTRS = ("resource-id", "name")
+_TEXT_ATTRS = ("text", "content-desc", "name", "label")
+# Every attribute the page tools filter on; the streamed page keeps elements with any of them
+_PAGE_ATTRS = tuple(dict.fromkeys(_LOCATOR_ATTRS + _TEXT_ATTRS))
+# "serial<TAB>state" rows of `adb devices` / host:devices; header and daemon notices have no tab
+_ADB_DEVICE_RE = re.compile(rb"^(\S+)\t([^\r\n]+)", re.MULTILINE)
+# AVD names in `emulator -list-avds` output; warning and INFO lines contain spaces or '|'
+_AVD_RE = re.compile(rb"^[ \t]*([A-Za-z0-9_.-]+)[ \t]*\r?$", re.MULTILINE)
+
+
+class _AlnumOnly(dict):
+    """str.translate table that drops every non-alphanumeric character, filled in lazily per code point."""
+
+    def __missing__(self, code_point):
+        value = code_point if chr(code_point).isalnum() else None
+        self[code_point] = value
+        return value
+
+
+_ALNUM_ONLY = _AlnumOnly()
 
 
 # --- UTILITIES ---
+# Directory of this module; bundled apps are looked up under its apps/ folder
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Host platform, resolved once at import
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM == "Windows"
+_IS_MAC = _SYSTEM == "Darwin"
+
+# Popen arguments for long-running children (emulators, Appium) that should outlive a tool
+# call: no inherited stdin, which is the MCP stdio transport, and their own session or process
+# group. Python's own fds are non-inheritable, so POSIX can skip the close_fds sweep.
+if _IS_WINDOWS:
+    _DETACHED = {"stdin": subprocess.DEVNULL, "creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _DETACHED = {"stdin": subprocess.DEVNULL, "start_new_session": True, "close_fds": False}
+
+
 def is_mac():
     """
     Checks if the current operating system is macOS.
@@ -27,9 +103,39 @@ def is_mac():
     Returns:
         bool: True if the OS is macOS (Darwin), False otherwise.
     """
-    return platform.system() == "Darwin"
+    return _IS_MAC
+
+
+# Misses are retried after this many seconds so a tool installed mid-session is picked up
+_EXE_MISS_TTL = 30
+
+
+def _exe_cache(func):
+    """Caches an executable lookup by name: hits for the server's lifetime, misses for _EXE_MISS_TTL seconds."""
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(name):
+        hit = cache.get(name)
+        if hit and (hit[1] is not None or time.monotonic() - hit[0] < _EXE_MISS_TTL):
+            return hit[1]
+        path = func(name)
+        cache[name] = (time.monotonic(), path)
+        return path
+    return wrapper
 
 
+@_exe_cache
+def find_executable(name):
+    """Finds a command on PATH, also checking npm's global folder on Windows (e.g. appium.cmd)."""
+    path = shutil.which(name)
+    if not path and _IS_WINDOWS:
+        npm_path = os.path.join(os.environ.get("APPDATA", ""), "npm", name + ".cmd")
+        if os.path.exists(npm_path): path = npm_path
+    return path
+
+
+@functools.lru_cache(maxsize=1)
 def get_android_sdk_root():
     """
     Finds the root directory of the Android SDK.
@@ -43,63 +149,181 @@ def get_android_sdk_root():
     if os.environ.get("ANDROID_HOME"): return os.environ.get("ANDROID_HOME")
     if os.environ.get("ANDROID_SDK_ROOT"): return os.environ.get("ANDROID_SDK_ROOT")
     user_home = os.path.expanduser("~")
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         return os.path.join(os.environ.get("LOCALAPPDATA", ""), "Android", "Sdk")
-    elif is_mac():
+    elif _IS_MAC:
         return os.path.join(user_home, "Library", "Android", "sdk")
     return None
 
-def get_avdmanager_path(sdk_root):
-    """Finds the avdmanager binary in the SDK."""
-    if not sdk_root: return None
-    
-    # Check cmdline-tools/latest/bin (Standard for newer SDKs)
-    path = os.path.join(sdk_root, "cmdline-tools", "latest", "bin", "avdmanager")
-    if platform.system() == "Windows": path += ".bat"
-    if os.path.exists(path): return path
-    
-    # Check cmdline-tools/bin (Older structure)
-    path = os.path.join(sdk_root, "cmdline-tools", "bin", "avdmanager")
-    if platform.system() == "Windows": path += ".bat"
-    if os.path.exists(path): return path
-
-    # Check tools/bin (Legacy)
-    path = os.path.join(sdk_root, "tools", "bin", "avdmanager")
-    if platform.system() == "Windows": path += ".bat"
-    if os.path.exists(path): return path
-    
-    return shutil.which("avdmanager")
+# Candidate SDK subdirectories for each binary, newest layout first
+_SDK_BINARIES = {
+    "avdmanager": (
+        os.path.join("cmdline-tools", "latest", "bin"),  # Standard for newer SDKs
+        os.path.join("cmdline-tools", "bin"),  # Older structure
+        os.path.join("tools", "bin"),  # Legacy
+    ),
+    "adb": ("platform-tools",),
+    "emulator": ("emulator",),
+}
+
+@_exe_cache
+def resolve_android_bin(name):
+    """
+    Finds an Android SDK binary such as 'avdmanager', 'emulator' or 'adb'.
+
+    The SDK locations listed in _SDK_BINARIES are checked first, then the system PATH.
+    Found paths are cached for the lifetime of the server since the SDK layout does not
+    change between calls; misses are retried after _EXE_MISS_TTL seconds.
+
+    Args:
+        name (str): The binary name, one of the keys of _SDK_BINARIES.
+
+    Returns:
+        str or None: The absolute path to the binary, or None if not found.
+    """
+    sdk_root = get_android_sdk_root()
+    if sdk_root:
+        suffix = (".bat" if name == "avdmanager" else ".exe") if _IS_WINDOWS else ""
+        for subdir in _SDK_BINARIES[name]:
+            path = os.path.join(sdk_root, subdir, name + suffix)
+            if os.path.exists(path): return path
+    return shutil.which(name)
+
+
+def missing_android_bin_error(label):
+    """Builds the error message for an Android binary that resolve_android_bin could not find."""
+    if not get_android_sdk_root(): return "Error: Android SDK not found."
+    return f"Error: {label} binary not found."
+
+
+def parse_adb_devices(output):
+    """
+    Parses `adb devices` style output.
+
+    Args:
+        output (bytes): Raw output of `adb devices` or a host:track-devices payload.
+
+    Returns:
+        list: (serial, state) tuples, e.g. ("emulator-5554", "device").
+    """
+    return [(serial.decode(), state.decode()) for serial, state in _ADB_DEVICE_RE.findall(output)]
+
+
+_ADB_TRACKER = {"thread": None, "ready": None, "devices": None}
+_ADB_TRACKER_LOCK = threading.Lock()
+
+
+def _track_adb_devices(ready):
+    """
+    Mirrors the adb server's host:track-devices stream into _ADB_TRACKER until it closes.
+
+    This speaks the adb smart-socket protocol on port 5037 (or ANDROID_ADB_SERVER_PORT):
+    after the OKAY status the server sends a length-prefixed device list on every change.
+    """
+    port = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+    request = b"host:track-devices"
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=2) as sock:
+            sock.sendall(b"%04x%s" % (len(request), request))
+            with sock.makefile("rb") as reply:
+                if reply.read(4) != b"OKAY":
+                    return
+                sock.settimeout(None)
+                while True:
+                    length = reply.read(4)
+                    if len(length) != 4:
+                        return
+                    devices = parse_adb_devices(reply.read(int(length, 16)))
+                    with _ADB_TRACKER_LOCK:
+                        _ADB_TRACKER["devices"] = devices
+                    ready.set()
+    except (OSError, ValueError):
+        pass
+    finally:
+        with _ADB_TRACKER_LOCK:
+            _ADB_TRACKER.update(thread=None, devices=None)
+        ready.set()
+
+
+def tracked_adb_devices():
+    """
+    Returns the adb server's device list as kept current by a background watcher.
+
+    The first call starts a daemon thread subscribed to host:track-devices; the adb server
+    then pushes a fresh list whenever a device connects, disconnects or changes state, so
+    later calls are answered from memory without any process spawn or socket round-trip.
+
+    Returns:
+        list: (serial, state) tuples, or None if the adb server is not reachable.
+    """
+    with _ADB_TRACKER_LOCK:
+        if _ADB_TRACKER["thread"] is None:
+            ready = threading.Event()
+            thread = threading.Thread(target=_track_adb_devices, args=(ready,), daemon=True)
+            _ADB_TRACKER.update(thread=thread, ready=ready)
+            thread.start()
+        ready = _ADB_TRACKER["ready"]
+    ready.wait(timeout=2)
+    with _ADB_TRACKER_LOCK:
+        return _ADB_TRACKER["devices"]
 
 
 # --- ANDROID TOOLS ---
+# Cached `emulator -list-avds` names. Invalidated after a TTL, when the AVD folder changes
+# on disk, or when `create_android_avd` adds one.
+_AVD_CACHE = {"ts": 0, "key": None, "avds": None}
+_AVD_CACHE_TTL = 60
+
+
+def _avd_home_mtime():
+    """Returns the modification time of the AVD folder, or None if it does not exist."""
+    avd_home = os.environ.get("ANDROID_AVD_HOME") or os.path.join(os.path.expanduser("~"), ".android", "avd")
+    try:
+        return os.stat(avd_home).st_mtime_ns
+    except OSError:
+        return None
+
+
+def list_avd_names(emulator_bin):
+    """
+    Returns the AVD names reported by `emulator -list-avds`, reusing a recent listing.
+
+    Args:
+        emulator_bin (str): Path to the emulator binary.
+
+    Returns:
+        list: AVD names as bytes.
+
+    Raises:
+        subprocess.CalledProcessError: If the emulator fails to list AVDs.
+    """
+    key = (emulator_bin, _avd_home_mtime())
+    now = time.monotonic()
+    if _AVD_CACHE["key"] == key and now - _AVD_CACHE["ts"] < _AVD_CACHE_TTL:
+        return _AVD_CACHE["avds"]
+    result = subprocess.run([emulator_bin, "-list-avds"], capture_output=True, check=True)
+    avds = _AVD_RE.findall(result.stdout)
+    _AVD_CACHE.update(ts=now, key=key, avds=avds)
+    return avds
+
+
 @mcp.tool()
 def list_android_avds():
     """
     Lists all available Android Virtual Devices (AVDs) that can be started.
 
-    This tool uses the `emulator -list-avds` command.
+    This tool uses the `emulator -list-avds` command, reusing recent output while the AVD folder is unchanged.
 
     Returns:
         str: A formatted string listing the names of available AVDs, or an error message.
     """
-    sdk_root = get_android_sdk_root()
-    if not sdk_root:
-        return "Error: Android SDK not found."
-
-    emulator_bin = os.path.join(sdk_root, "emulator", "emulator")
-    if platform.system() == "Windows":
-        emulator_bin += ".exe"
-
-    if not os.path.exists(emulator_bin):
-        emulator_bin = shutil.which("emulator")
-        if not emulator_bin:
-            return "Error: Emulator binary not found."
+    emulator_bin = resolve_android_bin("emulator")
+    if not emulator_bin:
+        return missing_android_bin_error("Emulator")
 
     try:
-        cmd = [emulator_bin, "-list-avds"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        avds = result.stdout.strip().split('\n')
-        return "Available AVDs:\n" + "\n".join(avds)
+        avds = list_avd_names(emulator_bin)
+        return "Available AVDs:\n" + b"\n".join(avds).decode("utf-8", "replace")
     except Exception as e:
         return f"Error listing AVDs: {str(e)}"
 
@@ -109,29 +333,25 @@ def list_connected_android_devices():
     """
     Lists all physically connected Android devices and running emulators.
 
-    This tool uses the `adb devices` command.
+    This tool reads the device list kept current by the adb server watcher and falls back
+    to the `adb devices` command (which also starts the server) if it is not running.
 
     Returns:
         str: A formatted string listing the UDIDs of connected devices, or an error message.
     """
-    sdk_root = get_android_sdk_root()
-    if not sdk_root:
-        return "Error: Android SDK not found."
-
-    adb_bin = os.path.join(sdk_root, "platform-tools", "adb")
-    if platform.system() == "Windows":
-        adb_bin += ".exe"
+    devices = tracked_adb_devices()
+    if devices is not None:
+        connected_devices = [serial for serial, _ in devices]
+        return "Connected Android Devices:\n" + "\n".join(connected_devices)
 
-    if not os.path.exists(adb_bin):
-        adb_bin = shutil.which("adb")
-        if not adb_bin:
-            return "Error: ADB binary not found."
+    adb_bin = resolve_android_bin("adb")
+    if not adb_bin:
+        return missing_android_bin_error("ADB")
 
     try:
         cmd = [adb_bin, "devices"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        devices = result.stdout.strip().split('\n')[1:]  # Skip the "List of devices attached" header
-        connected_devices = [line.split('\t')[0] for line in devices if line]
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        connected_devices = [serial for serial, _ in parse_adb_devices(result.stdout)]
         return "Connected Android Devices:\n" + "\n".join(connected_devices)
     except Exception as e:
         return f"Error listing connected Android devices: {str(e)}"
@@ -151,10 +371,9 @@ def create_android_avd(name: str, package: str, device: str = "pixel"):
     Returns:
         str: Success or error message.
     """
-    sdk_root = get_android_sdk_root()
-    if not sdk_root: return "Error: Android SDK not found."
+    if not get_android_sdk_root(): return "Error: Android SDK not found."
     
-    avdmanager = get_avdmanager_path(sdk_root)
+    avdmanager = resolve_android_bin("avdmanager")
     if not avdmanager: return "Error: avdmanager binary not found in Android SDK."
 
     # Command: avdmanager create avd -n <name> -k <package> -d <device>
@@ -162,12 +381,14 @@ def create_android_avd(name: str, package: str, device: str = "pixel"):
     
     try:
         # We pipe "no" to stdin because avdmanager asks "Do you wish to create a custom hardware profile? [no]"
-        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = process.communicate(input="no\n")
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate(input=b"no\n")
         
         if process.returncode == 0:
+            _AVD_CACHE["ts"] = 0  # New AVD; force a fresh listing
             return f"Success: Created AVD '{name}' using package '{package}' and device '{device}'."
         else:
+            stdout, stderr = stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
             return f"Error creating AVD:\nSTDOUT: {stdout}\nSTDERR: {stderr}"
     except Exception as e:
         return f"Exception during AVD creation: {str(e)}"
@@ -184,26 +405,211 @@ def start_android_emulator(avd_name: str):
     Returns:
         str: A success or error message.
     """
-    sdk_root = get_android_sdk_root()
-    if not sdk_root: return "Error: Android SDK not found."
-
-    emulator_bin = os.path.join(sdk_root, "emulator", "emulator")
-    if platform.system() == "Windows": emulator_bin += ".exe"
-
-    if not os.path.exists(emulator_bin):
-        emulator_bin = shutil.which("emulator")
-        if not emulator_bin: return "Error: Emulator binary not found."
+    emulator_bin = resolve_android_bin("emulator")
+    if not emulator_bin: return missing_android_bin_error("Emulator")
 
     try:
         cmd = [emulator_bin, "@" + avd_name]
-        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **_DETACHED)
         return f"Success: Command sent to launch Android AVD '{avd_name}'."
     except Exception as e:
         return f"Error starting emulator: {str(e)}"
 
 
+class AdbSession:
+    """
+    A persistent `adb shell` process for a single device.
+
+    Commands are written to the shell's stdin and their output is read back up to a
+    sentinel line, so repeated queries skip the adb client start-up and device handshake.
+    A reader thread feeds the output into a queue so every read can honour a deadline.
+    """
+    _SENTINEL = "__APPIUM_MCP_END__"
+
+    def __init__(self, adb_bin, serial):
+        self.serial = serial
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            [adb_bin, "-s", serial, "shell"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace", bufsize=1
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        """Moves shell output lines into the queue, ending with None once the shell exits."""
+        try:
+            for line in self._proc.stdout:
+                self._lines.put(line)
+        finally:
+            self._lines.put(None)
+
+    def is_alive(self):
+        """Returns True while the underlying shell process is running."""
+        return self._proc.poll() is None
+
+    def send(self, cmd, timeout=30):
+        """
+        Runs a command in the shell and waits for it to finish.
+
+        Args:
+            cmd (str): The shell command to run on the device.
+            timeout (float, optional): Seconds to wait for the command to finish. Defaults to 30.
+
+        Returns:
+            tuple: (exit_code, output) of the command.
+
+        Raises:
+            TimeoutError: If the command does not finish in time. The session is closed, since
+                          the shell is still busy with (or stuck parsing) the command.
+            RuntimeError: If the shell exits while the command is running.
+        """
+        deadline = time.monotonic() + timeout
+        if not self._lock.acquire(timeout=timeout):
+            raise TimeoutError(f"adb shell session for '{self.serial}' is busy with another command.")
+        try:
+            # Group the command so stdin redirection covers all of it and it cannot swallow the sentinel
+            output = []
+            try:
+                self._proc.stdin.write(f"{{ {cmd}\n}} </dev/null 2>&1\necho {self._SENTINEL}$?\n")
+                self._proc.stdin.flush()
+            except BrokenPipeError:
+                # The shell is already gone; collect whatever adb printed before it exited
+                while True:
+                    try:
+                        line = self._lines.get(timeout=1)
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        break
+                    output.append(line)
+                raise self._exited(output)
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    self.close()
+                    raise TimeoutError(f"Command did not finish within {timeout}s; the adb shell session was closed.")
+                if line is None:
+                    raise self._exited(output)
+                idx = line.find(self._SENTINEL)
+                if idx != -1:
+                    output.append(line[:idx])
+                    return int(line[idx + len(self._SENTINEL):].strip() or 0), "".join(output)
+                output.append(line)
+        finally:
+            self._lock.release()
+
+    def _exited(self, output):
+        """Closes the dead shell and returns an error carrying its last output (e.g. adb's own errors)."""
+        self.close()
+        message = f"adb shell session for '{self.serial}' exited unexpectedly."
+        detail = "".join(output).strip()
+        return RuntimeError(f"{message}\n{detail}" if detail else message)
+
+    def close(self):
+        """Terminates the shell process."""
+        if self.is_alive():
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._proc.kill()
+            self._proc.wait()
+
+
+# Open `adb shell` sessions, keyed by device serial
+_ADB_SESSIONS = {}
+_ADB_SESSIONS_LOCK = threading.Lock()
+
+
+def get_adb_session(serial):
+    """Returns a live AdbSession for the device, starting one if needed."""
+    with _ADB_SESSIONS_LOCK:
+        session = _ADB_SESSIONS.get(serial)
+        if session is None or not session.is_alive():
+            adb_bin = resolve_android_bin("adb")
+            if not adb_bin: return None
+            session = _ADB_SESSIONS[serial] = AdbSession(adb_bin, serial)
+        return session
+
+
+def drop_adb_session(serial, session):
+    """Removes a dead session from _ADB_SESSIONS unless it has already been replaced."""
+    with _ADB_SESSIONS_LOCK:
+        if _ADB_SESSIONS.get(serial) is session:
+            del _ADB_SESSIONS[serial]
+
+
+@mcp.tool()
+def run_adb_shell_command(udid: str, command: str, timeout: int = 30):
+    """
+    Runs a shell command on a connected Android device or emulator.
+
+    A persistent `adb shell` session is kept per device, so repeated commands do not pay
+    for a new adb process each time.
+
+    Args:
+        udid (str): The device serial as listed by `list_connected_android_devices`.
+        command (str): The shell command to run (e.g., "getprop ro.build.version.release").
+        timeout (int, optional): Seconds to wait for the command to finish. Defaults to 30.
+                                 Long-running commands such as `logcat` should be bounded
+                                 (e.g., `logcat -d`).
+
+    Returns:
+        str: The command output, or an error message.
+    """
+    session = get_adb_session(udid)
+    if not session:
+        return missing_android_bin_error("ADB")
+
+    try:
+        exit_code, output = session.send(command, timeout)
+    except Exception as e:
+        if not session.is_alive():
+            drop_adb_session(udid, session)
+        return f"Error running adb shell command: {str(e)}"
+
+    if exit_code != 0:
+        return f"Command exited with status {exit_code}:\n{output}"
+    return output
+
+
 # --- iOS TOOLS ---
 
+def simctl_devices():
+    """
+    Returns the available simulators as reported by `xcrun simctl list devices available -j`.
+
+    The result is shared by the iOS tools and cached, so a listing followed by a boot
+    costs a single xcrun call.
+
+    Returns:
+        tuple: (data, udids) where data is the parsed simctl JSON and udids maps simulator names to UDIDs.
+    """
+    try:
+        key = os.path.getmtime(_SIM_DEVICE_SET)
+    except OSError:
+        key = None
+    if _SIM_CACHE["data"] is not None and _SIM_CACHE["key"] == key and time.time() - _SIM_CACHE["ts"] < _SIM_CACHE_TTL:
+        return _SIM_CACHE["data"], _SIM_CACHE["udids"]
+
+    cmd = ["xcrun", "simctl", "list", "devices", "available", "-j"]
+    result = subprocess.run(cmd, capture_output=True)
+    data = json_loads(result.stdout)
+
+    # Xcode creates the same device names for every runtime; the last one listed wins, as
+    # in the original name lookup of run_parallel_tests
+    udids = {}
+    for devices in data.get("devices", {}).values():
+        for device in devices:
+            udids[device['name']] = device['udid']
+
+    _SIM_CACHE.update(ts=time.time(), key=key, data=data, udids=udids)
+    return data, udids
+
+
 @mcp.tool()
 def list_ios_simulators():
     """
@@ -217,9 +623,7 @@ def list_ios_simulators():
     if not is_mac(): return "Error: iOS Simulators are only available on macOS."
 
     try:
-        cmd = ["xcrun", "simctl", "list", "devices", "available", "-j"]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        data = json.loads(result.stdout)
+        data, _ = simctl_devices()
 
         simulators = []
         for runtime, devices in data.get("devices", {}).items():
@@ -233,12 +637,37 @@ def list_ios_simulators():
         return f"Failed to list simulators: {str(e)}"
 
 
+def _list_devicectl_devices():
+    """Lists paired physical iOS devices via devicectl, or None if devicectl is unavailable."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "devices.json")
+        cmd = ["xcrun", "devicectl", "list", "devices", "--quiet", "--json-output", json_path]
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+            with open(json_path, "rb") as f:
+                data = json_loads(f.read())
+        except (OSError, ValueError, subprocess.CalledProcessError):
+            return None
+
+    devices = []
+    for device in data.get("result", {}).get("devices", []):
+        if device.get("connectionProperties", {}).get("pairingState") != "paired":
+            continue
+        hardware = device.get("hardwareProperties", {})
+        if hardware.get("platform") != "iOS":
+            continue
+        props = device.get("deviceProperties", {})
+        devices.append(f"{props.get('name')} ({props.get('osVersionNumber')}) ({hardware.get('udid')})")
+    return devices
+
+
 @mcp.tool()
 def list_connected_ios_devices():
     """
     (Mac Only) Lists all physically connected iOS devices.
 
-    This tool uses the `xcrun xctrace list devices` command.
+    This tool uses `xcrun devicectl list devices` (Xcode 15+) and falls back to
+    the much slower `xcrun xctrace list devices` on older Xcode versions.
 
     Returns:
         str: A formatted string listing connected iOS devices, or an error message.
@@ -246,10 +675,14 @@ def list_connected_ios_devices():
     if not is_mac():
         return "Error: iOS devices can only be listed on macOS."
 
+    devices = _list_devicectl_devices()
+    if devices is not None:
+        return "Connected iOS Devices:\n" + "\n".join(devices)
+
     try:
         cmd = ["xcrun", "xctrace", "list", "devices"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        output = result.stdout.decode("utf-8", "replace")
         devices = []
         for line in output.splitlines():
             if "iPhone" in line and "Simulator" not in line:
@@ -273,7 +706,10 @@ def start_ios_simulator(device_name_or_uuid: str):
     if not is_mac(): return "Error: iOS Simulators are only available on macOS."
 
     try:
-        subprocess.run(["xcrun", "simctl", "boot", device_name_or_uuid], check=False)
+        _, udids = simctl_devices()
+        udid = udids.get(device_name_or_uuid, device_name_or_uuid)
+        subprocess.run(["xcrun", "simctl", "boot", udid], check=False)
+        _SIM_CACHE["ts"] = 0  # Simulator state changed; force a fresh listing
         subprocess.run(["open", "-a", "Simulator"], check=True)
         return f"Success: Boot command sent for '{device_name_or_uuid}' and Simulator app opened."
     except Exception as e:
@@ -283,12 +719,15 @@ def start_ios_simulator(device_name_or_uuid: str):
 @mcp.tool()
 def build_and_install_ios_app(project_path: str, scheme: str, device_name_or_uuid: str):
     """
-    (Mac Only) Builds an Xcode project and installs the app to a running simulator.
+    (Mac Only) Builds an Xcode project and installs the app to a simulator.
+
+    The simulator is booted in the background while the build runs, so it is usually
+    ready by the time the app is installed.
 
     Args:
         project_path (str): The full path to the folder containing the .xcodeproj or .xcworkspace file.
         scheme (str): The Xcode build scheme name (e.g., "MyApp-Debug").
-        device_name_or_uuid (str): The UUID of the booted simulator to install the app on.
+        device_name_or_uuid (str): The UUID of the simulator to install the app on.
 
     Returns:
         str: A success or error message.
@@ -298,40 +737,75 @@ def build_and_install_ios_app(project_path: str, scheme: str, device_name_or_uui
     derived_data = os.path.join(project_path, "build_mcp")
     cmd = [
         "xcodebuild", "-scheme", scheme, "-sdk", "iphonesimulator",
-        "-configuration", "Debug", "-derivedDataPath", derived_data
+        "-configuration", "Debug", "-derivedDataPath", derived_data,
+        "-parallelizeTargets", "-jobs", str(os.cpu_count() or 1)
     ]
 
     if os.path.exists(os.path.join(project_path, f"{scheme}.xcworkspace")):
         cmd.extend(["-workspace", os.path.join(project_path, f"{scheme}.xcworkspace")])
     else:
-        files = [f for f in os.listdir(project_path) if f.endswith(".xcodeproj")]
-        if not files: return "Error: No .xcodeproj found in path."
-        cmd.extend(["-project", os.path.join(project_path, files[0])])
+        with os.scandir(project_path) as it:
+            xcodeproj = next((e.path for e in it if e.name.endswith(".xcodeproj")), None)
+        if not xcodeproj: return "Error: No .xcodeproj found in path."
+        cmd.extend(["-project", xcodeproj])
 
     try:
-        print("Starting Xcode Build... this may take a minute.")
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        print("Starting Xcode Build... this may take a minute.", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # `bootstatus -b` boots the simulator if needed and waits until it is usable
+            boot = executor.submit(
+                subprocess.run, ["xcrun", "simctl", "bootstatus", device_name_or_uuid, "-b"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            build = executor.submit(subprocess.run, cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            boot.result()
+            build.result()
+        _SIM_CACHE["ts"] = 0  # The simulator may have been booted; force a fresh listing
 
         products_dir = os.path.join(derived_data, "Build", "Products", "Debug-iphonesimulator")
         if not os.path.exists(products_dir):
             return f"Build failed: Output directory {products_dir} not found."
 
-        app_files = [f for f in os.listdir(products_dir) if f.endswith(".app")]
-        if not app_files:
+        with os.scandir(products_dir) as it:
+            app = next((e for e in it if e.name.endswith(".app")), None)
+        if not app:
             return "Build successful, but could not locate .app file to install."
 
-        app_path = os.path.join(products_dir, app_files[0])
-        install_cmd = ["xcrun", "simctl", "install", device_name_or_uuid, app_path]
+        install_cmd = ["xcrun", "simctl", "install", device_name_or_uuid, app.path]
         subprocess.run(install_cmd, check=True)
 
-        return f"Success: Built '{app_files[0]}' and installed on {device_name_or_uuid}."
+        return f"Success: Built '{app.name}' and installed on {device_name_or_uuid}."
     except subprocess.CalledProcessError as e:
-        return f"Error during build/install: {e.stderr.decode('utf-8') if e.stderr else str(e)}"
+        return f"Error during build/install: {e.stderr.decode('utf-8', 'replace') if e.stderr else str(e)}"
     except Exception as e:
         return f"Critical error: {str(e)}"
 
 
 # --- SHARED TOOLS ---
+def _port_open(port):
+    """Checks whether a server is accepting connections on the given local port."""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.25):
+            return True
+    except OSError:
+        return False
+
+
+def _appium_status_ok(port):
+    """Checks that the server on the given local port answers Appium's /status endpoint."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=0.5)
+    try:
+        conn.request("GET", "/status")
+        return conn.getresponse().status == 200
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        conn.close()
+
+
+_APPIUM_START_TIMEOUT = 10
+
+
 @mcp.tool()
 def start_appium_server(port: int = 4723):
     """
@@ -343,24 +817,64 @@ def start_appium_server(port: int = 4723):
     Returns:
         str: A message indicating the status of the Appium server.
     """
-    try:
-        requests.get(f"http://127.0.0.1:{port}/status", timeout=1)
-        return f"Appium is already running on port {port}."
-    except:
-        pass
-
-    appium_exec = shutil.which("appium")
-    if not appium_exec and platform.system() == "Windows":
-        appium_exec = os.path.join(os.environ.get("APPDATA", ""), "npm", "appium.cmd")
+    # Only pay for the HTTP round trip when something is actually listening
+    if _port_open(port):
+        if _appium_status_ok(port):
+            return f"Appium is already running on port {port}."
+        return f"Error: Port {port} is in use by another process."
 
+    appium_exec = find_executable("appium")
     if not appium_exec: return "Error: 'appium' command not found in system PATH."
 
-    log_file = os.path.join(os.getcwd(), "appium_server.log")
+    log_file = os.path.join(os.getcwd(), f"appium_server_{port}.log")
+    # Windows runs a resolved appium.cmd directly; only an extension-less path needs cmd.exe
+    argv = [appium_exec, "-p", str(port), "--allow-cors"]
+    if _IS_WINDOWS and not os.path.splitext(appium_exec)[1]:
+        argv = ["cmd.exe", "/c"] + argv
     with open(log_file, "w") as f:
-        use_shell = True if platform.system() == "Windows" else False
-        subprocess.Popen([appium_exec, "-p", str(port), "--allow-cors"], stdout=f, stderr=f, shell=use_shell)
-    time.sleep(3)
-    return f"Appium server started on port {port}. Log file at: {log_file}"
+        process = subprocess.Popen(argv, stdout=f, stderr=f, **_DETACHED)
+
+    # Return as soon as /status answers; the cheap port probe gates the HTTP request
+    deadline = time.monotonic() + _APPIUM_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if _port_open(port) and _appium_status_ok(port):
+            return f"Appium server started on port {port}. Log file at: {log_file}"
+        if process.poll() is not None:
+            return f"Error: Appium exited during startup. Check the log file at: {log_file}"
+        time.sleep(0.05)
+    return f"Error: Appium did not become ready on port {port} within {_APPIUM_START_TIMEOUT}s. Check the log file at: {log_file}"
+
+
+@mcp.tool()
+def start_appium_servers(ports: str):
+    """
+    Starts Appium servers on several ports concurrently, e.g. one per device for parallel runs.
+
+    Args:
+        ports (str): Comma-separated list of port numbers (e.g., "4723,4725,4727").
+
+    Returns:
+        str: The status of the Appium server on each port.
+    """
+    try:
+        # Deduplicate so a repeated port does not spawn two servers racing for it
+        port_list = list(dict.fromkeys(int(p) for p in ports.split(',') if p.strip()))
+    except ValueError:
+        return f"Error: Invalid port list '{ports}'."
+    if not port_list:
+        return "Error: No ports specified."
+
+    with ThreadPoolExecutor(max_workers=len(port_list)) as executor:
+        results = list(executor.map(start_appium_server, port_list))
+    return "\n".join(results)
+
+
+# Folder layout created by `scaffold_bdd_framework`, reduced to its deepest unique paths
+# since makedirs builds shared parents such as src/test along the way
+_BDD_DIRS = tuple(os.path.normpath(d) for d in (
+    "src/test/java/stepDefinitions", "src/test/java/pages", "src/test/resources/features"
+))
+_BDD_LEAVES = tuple(d for d in sorted(_BDD_DIRS) if not any(o.startswith(d + os.sep) for o in _BDD_DIRS))
 
 
 @mcp.tool()
@@ -375,18 +889,37 @@ def scaffold_bdd_framework(project_name: str):
         str: A success message indicating the project was scaffolded.
     """
     base = os.path.join(os.getcwd(), project_name)
-    dirs = ["src/test/java/stepDefinitions", "src/test/java/pages", "src/test/resources/features"]
-    for d in dirs: os.makedirs(os.path.join(base, d), exist_ok=True)
+    for leaf in _BDD_LEAVES:
+        os.makedirs(os.path.join(base, leaf), exist_ok=True)
     return f"BDD framework scaffolded at: {base}"
 
 
+@functools.lru_cache(maxsize=None)
+def get_appium_connection(url):
+    """
+    Returns a keep-alive connection to the Appium server at url, shared by every session on it.
+
+    A custom executor takes precedence over any client_config given to webdriver.Remote, so
+    client options (e.g. direct_connection, off by default) must be set here.
+    """
+    return AppiumConnection(client_config=AppiumClientConfig(remote_server_addr=url, keep_alive=True))
+
+
+# Per-platform Appium options: (options class, automation name, platform name, extra capabilities)
+_PLATFORMS = {
+    'android': (UiAutomator2Options, 'UiAutomator2', 'Android', (('app_wait_activity', '*'), ('app_wait_duration', 30000))),
+    'ios': (XCUITestOptions, 'XCUITest', 'iOS', (('wda_launch_timeout', 60000),)),
+}
+
+
 @mcp.tool()
 def launch_app_and_inspector(platform_name: str, app_filename: str, device_name: str):
     """
     Installs and launches a mobile app on a specified device or simulator.
 
-    This function initializes the global Appium driver, which is required for other tools
-    like `extract_page_locators`.
+    This function starts a new Appium session, which is required for other tools like
+    `extract_page_locators`. Earlier sessions stay open so several devices can be driven
+    at once.
 
     Args:
         platform_name (str): The mobile platform, either 'Android' or 'iOS'.
@@ -394,50 +927,172 @@ def launch_app_and_inspector(platform_name: str, app_filename: str, device_name:
         device_name (str): The name of the device or simulator (e.g., "Pixel_6_Pro", "iPhone 15").
 
     Returns:
-        str: A success or error message.
+        str: A success message including the new session ID, or an error message.
     """
-    global driver
-
-    app_path = app_filename
-    if not os.path.exists(app_path):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        fallback = os.path.join(base_dir, "apps", os.path.basename(app_filename))
-        if os.path.exists(fallback):
-            app_path = fallback
-        elif platform_name.lower() == 'ios' and '.' in app_filename and '/' not in app_filename:
-            app_path = app_filename
-        else:
-            return f"Error: App file or bundle ID '{app_filename}' not found."
+    global _LAST_SESSION
+
+    key = platform_name.lower()
+    platform_config = _PLATFORMS.get(key)
+    if platform_config is None:
+        return f"Error: Unsupported platform '{platform_name}'."
+
+    # Look for the file as given, then in the bundled apps/ folder; otherwise it may be an iOS bundle ID
+    app_path = None
+    for candidate in (app_filename, os.path.join(_HERE, "apps", os.path.basename(app_filename))):
+        try:
+            os.stat(candidate)
+        except OSError:
+            continue
+        app_path = candidate
+        break
+    if app_path is None and not (key == 'ios' and '.' in app_filename and '/' not in app_filename):
+        return f"Error: App file or bundle ID '{app_filename}' not found."
 
     try:
-        options = None
-        if platform_name.lower() == 'android':
-            options = UiAutomator2Options()
-            options.automation_name = 'UiAutomator2'
-            options.app_wait_activity = '*'
-            options.app_wait_duration = 30000
-        elif platform_name.lower() == 'ios':
-            if not is_mac(): return "iOS automation requires macOS."
-            options = XCUITestOptions()
-            options.automation_name = 'XCUITest'
-            options.wda_launch_timeout = 60000
-
-        if options:
-            options.platform_name = platform_name
-            options.device_name = device_name
-            if os.path.exists(app_path):
-                options.app = app_path
-            else:
-                options.bundle_id = app_path
+        if key == 'ios' and not is_mac(): return "iOS automation requires macOS."
+        options_cls, automation_name, canonical_name, extra_caps = platform_config
+        options = options_cls()
+        options.automation_name, options.platform_name, options.device_name = automation_name, canonical_name, device_name
+        for cap, value in extra_caps:
+            setattr(options, cap, value)
+        if app_path:
+            options.app = app_path
+        else:
+            options.bundle_id = app_filename
 
-        driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
-        return f"Success: Launched '{app_filename}' on {platform_name} device '{device_name}'."
+        driver = webdriver.Remote(command_executor=get_appium_connection('http://127.0.0.1:4723'), options=options)
+        with _SESSIONS_LOCK:
+            _SESSIONS[driver.session_id] = driver
+            _LAST_SESSION = driver.session_id
+        return f"Success: Launched '{app_filename}' on {platform_name} device '{device_name}' (session: {driver.session_id})."
     except Exception as e:
         return f"Launch Failed: {str(e)}"
 
 
+_PAGE_CACHE = None  # (source digest, parsed page, monotonic timestamp)
+_PAGE_CACHE_TTL = 10
+
+# Deep hierarchies can exceed libxml2's default safety limits, and page sources have no
+# xml:id attributes worth indexing
+_LXML_PARSER = lxml_etree.XMLParser(huge_tree=True, collect_ids=False) if lxml_etree is not None else None
+
+
+def parse_page_source(source):
+    """
+    Parses the page source, reusing the previous result if the same screen was parsed recently.
+
+    Tools are often called back-to-back on one screen (extract, then heal), so the result is
+    cached for _PAGE_CACHE_TTL seconds keyed on a blake2b digest of the source.
+
+    Args:
+        source (str): The page source XML.
+
+    Returns:
+        The lxml root element if lxml is installed, otherwise the list built by
+        _stream_page_elements.
+    """
+    global _PAGE_CACHE
+    data = source.encode("utf-8")
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    now = time.monotonic()
+    if _PAGE_CACHE and _PAGE_CACHE[0] == digest and now - _PAGE_CACHE[2] < _PAGE_CACHE_TTL:
+        return _PAGE_CACHE[1]
+    page = lxml_etree.fromstring(data, _LXML_PARSER) if lxml_etree is not None else _stream_page_elements(data)
+    _PAGE_CACHE = (digest, page, now)
+    return page
+
+
+def _stream_page_elements(data):
+    """Streams the page source with iterparse, keeping only elements that carry one of _PAGE_ATTRS."""
+    kept = []
+    # Attributes are read on "start" to keep document order; subtrees are freed on "end"
+    for event, element in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+        if event == "end":
+            del element[:]  # Drops the children but keeps this element's own tag and attributes
+        else:
+            attrib = element.attrib
+            if attrib and any(a in attrib for a in _PAGE_ATTRS):
+                kept.append(element)
+    return kept
+
+
+def iter_page_elements(page, attrs):
+    """
+    Yields the page elements that carry at least one of the given attributes, in document order.
+
+    With lxml installed the filtering is a single XPath query evaluated in C. Otherwise the
+    source was streamed with ElementTree.iterparse so the full tree is never held in memory.
+
+    Args:
+        page: The parsed page, as returned by `parse_page_source`.
+        attrs (tuple): Attribute names of interest, a subset of _PAGE_ATTRS.
+    """
+    if lxml_etree is not None:
+        yield from _attrs_xpath(attrs)(page)
+        return
+
+    for element in page:
+        attrib = element.attrib
+        if any(a in attrib for a in attrs):
+            yield element
+
+
+def _xpath_literal(value):
+    """Quotes a string as an XPath 1.0 literal, using concat() if it contains both quote kinds."""
+    if "'" not in value: return f"'{value}'"
+    if '"' not in value: return f'"{value}"'
+    return "concat('" + value.replace("'", "', \"'\", '") + "')"
+
+
+@functools.lru_cache(maxsize=None)
+def _attrs_xpath(attrs):
+    """Compiles the lxml XPath selecting elements that carry any of the given attributes."""
+    return lxml_etree.XPath("//*[%s]" % " or ".join("@" + a for a in attrs))
+
+
+def get_driver(session_id=None):
+    """Returns the driver for session_id, or for the most recent session if it is omitted; None if unknown."""
+    with _SESSIONS_LOCK:
+        return _SESSIONS.get(session_id or _LAST_SESSION)
+
+
+def forget_session(session_id):
+    """Removes a session from _SESSIONS, falling back to the newest remaining one as the default; returns its driver."""
+    global _LAST_SESSION
+    with _SESSIONS_LOCK:
+        driver = _SESSIONS.pop(session_id, None)
+        if _LAST_SESSION == session_id:
+            _LAST_SESSION = next(reversed(_SESSIONS), None)
+    return driver
+
+
 @mcp.tool()
-def extract_page_locators(page_name: str, save_path: str):
+def close_app_session(session_id: str = None):
+    """
+    Ends an Appium session started by `launch_app_and_inspector` and releases its driver.
+
+    Args:
+        session_id (str, optional): The session to close. Defaults to the most recently launched session.
+
+    Returns:
+        str: A success or error message.
+    """
+    with _SESSIONS_LOCK:
+        session_id = session_id or _LAST_SESSION
+    driver = forget_session(session_id) if session_id else None
+    if not driver:
+        return "Error: No active Appium driver session found."
+
+    try:
+        driver.quit()
+    except Exception as e:
+        # Typically the server already ended it (e.g. newCommandTimeout); it is unregistered either way
+        return f"Session {session_id} removed; Appium reported: {str(e)}"
+    return f"Success: Closed session {session_id}."
+
+
+@mcp.tool()
+def extract_page_locators(page_name: str, save_path: str, session_id: str = None):
     """
     Extracts UI element locators from the current screen and generates a Java Page Object class.
 
@@ -446,40 +1101,43 @@ def extract_page_locators(page_name: str, save_path: str):
     Args:
         page_name (str): The desired class name for the generated Java file (e.g., "LoginPage").
         save_path (str): The directory path where the Java file should be saved.
+        session_id (str, optional): The session to read from, as returned by `launch_app_and_inspector`.
+                                    Defaults to the most recently launched session.
 
     Returns:
         str: A success message with the path to the saved file, or an error message.
     """
-    global driver
+    driver = get_driver(session_id)
     if not driver: return "Error: No active Appium driver session found. Use 'launch_app_and_inspector' first."
     try:
-        source = driver.page_source
-        root = ET.fromstring(source)
-        locators = []
-        for element in root.iter():
-            res_id = element.attrib.get('resource-id')
-            name = element.attrib.get('name')
-
-            if res_id:
-                locators.append(f'    @AndroidFindBy(id="{res_id}")')
-                locators.append(f'    public MobileElement {res_id.split("/")[-1]};')
-            elif name:
-                safe_name = "".join(x for x in name if x.isalnum())
-                if safe_name:
-                    locators.append(f'    @iOSXCUITFindBy(accessibilityId="{name}")')
-                    locators.append(f'    public MobileElement {safe_name};')
-
-        file_content = f"public class {page_name} {{\n\n" + "\n\n".join(locators) + "\n\n}"
+        # Parse before touching the output file so a bad page source leaves any existing class intact
+        page = parse_page_source(driver.page_source)
+        os.makedirs(save_path, exist_ok=True)
         full_path = os.path.join(save_path, f"{page_name}.java")
-        with open(full_path, "w") as f:
-            f.write(file_content)
+        # Locators are written as they are found; the file buffer batches them into few syscalls
+        with open(full_path, "w", encoding="utf-8", newline="", buffering=1 << 16) as f:
+            write = f.write
+            write(_PAGE_CLASS_HEADER % page_name)
+            for element in iter_page_elements(page, _LOCATOR_ATTRS):
+                # Element.get is a direct C-level lookup for both ElementTree and lxml elements
+                res_id = element.get('resource-id')
+                if res_id:
+                    write(_ANDROID_LOCATOR_TMPL % (res_id, res_id.rsplit("/", 1)[-1]))
+                elif (name := element.get('name')):
+                    safe_name = name.translate(_ALNUM_ONLY)
+                    if safe_name:
+                        write(_IOS_LOCATOR_TMPL % (name, safe_name))
+            write("}")
         return f"Page Object class saved to: {full_path}"
+    except InvalidSessionIdException:
+        forget_session(driver.session_id)
+        return "Error: The Appium session has ended. Use 'launch_app_and_inspector' to start a new one."
     except Exception as e:
         return f"Error extracting locators: {str(e)}"
 
 
 @mcp.tool()
-def heal_locator(target_text: str, expected_type: str = None):
+def heal_locator(target_text: str, expected_type: str = None, session_id: str = None):
     """
     Finds a reliable locator for an element based on its visible text.
 
@@ -489,26 +1147,29 @@ def heal_locator(target_text: str, expected_type: str = None):
     Args:
         target_text (str): The visible text (or content-desc) of the element to find.
         expected_type (str, optional): The expected class name of the element (e.g., "android.widget.Button").
+        session_id (str, optional): The session to read from, as returned by `launch_app_and_inspector`.
+                                    Defaults to the most recently launched session.
 
     Returns:
         str: A string with the best locator found (e.g., "id: new_id"), or an error message.
     """
-    global driver
+    driver = get_driver(session_id)
     if not driver:
         return "Error: No active Appium driver session found. Use 'launch_app_and_inspector' first."
 
     try:
-        source = driver.page_source
-        root = ET.fromstring(source)
+        page = parse_page_source(driver.page_source)
         candidates = []
+        matcher = difflib.SequenceMatcher(None, target_text)
 
-        for element in root.iter():
+        for element in iter_page_elements(page, _TEXT_ATTRS):
             # Get all relevant text attributes
-            text = element.attrib.get('text', '')
-            content_desc = element.attrib.get('content-desc', '')
-            res_id = element.attrib.get('resource-id', '')
-            name = element.attrib.get('name', '') # For iOS
-            label = element.attrib.get('label', '') # For iOS
+            get = element.get
+            text = get('text', '')
+            content_desc = get('content-desc', '')
+            res_id = get('resource-id', '')
+            name = get('name', '') # For iOS
+            label = get('label', '') # For iOS
             elem_type = element.tag
 
             # Check if the element text is a close match
@@ -520,134 +1181,323 @@ def heal_locator(target_text: str, expected_type: str = None):
             if expected_type and elem_type != expected_type:
                 continue
 
-            # Score based on similarity
-            similarity = difflib.SequenceMatcher(None, target_text, current_text).ratio()
+            # Score based on similarity. real_quick_ratio() and quick_ratio() are cheap upper
+            # bounds of ratio(), so most non-matching elements are rejected without the full scan
+            matcher.set_seq2(current_text)
+            if matcher.real_quick_ratio() <= 0.8 or matcher.quick_ratio() <= 0.8:
+                continue
+            similarity = matcher.ratio()
             if similarity > 0.8: # High confidence threshold
                 # Prefer ID or accessibility ID if available
                 if res_id:
-                    candidates.append((similarity, f"id: {res_id}"))
+                    candidates.append((similarity, "id", res_id))
                 elif name:
-                     candidates.append((similarity, f"accessibilityId: {name}"))
-                else: # Fallback to XPath
-                    # Simple XPath based on text
-                    xpath = f"//[{elem_type} and @text='{current_text}']"
-                    candidates.append((similarity, f"xpath: {xpath}"))
+                     candidates.append((similarity, "accessibilityId", name))
+                else: # Fallback to XPath on whichever attribute supplied the text
+                    attr = "text" if text else "content-desc" if content_desc else "label"
+                    candidates.append((similarity, "xpath", (elem_type, attr, current_text)))
+                # Nothing can beat an exact match and ties keep document order, so stop scanning
+                if similarity == 1.0:
+                    break
 
         if not candidates:
             return "Could not find a suitable element to heal the locator."
 
-        # Return the best candidate
+        # Return the best candidate, building its XPath only now that it has won
         candidates.sort(key=lambda x: x[0], reverse=True)
-        return f"Found best match: {candidates[0][1]}"
-
+        _, kind, value = candidates[0]
+        if kind == "xpath":
+            elem_type, attr, current_text = value
+            value = f"//{elem_type}[@{attr}={_xpath_literal(current_text)}]"
+        return f"Found best match: {kind}: {value}"
+
+    except InvalidSessionIdException:
+        forget_session(driver.session_id)
+        return "Error: The Appium session has ended. Use 'launch_app_and_inspector' to start a new one."
     except Exception as e:
         return f"Error during locator healing: {str(e)}"
 
 
 @mcp.tool()
-def run_parallel_tests(device_names: str, platform_name: str, test_command_pattern: str):
+def start_devices(device_names: str, platform_name: str):
     """
-    Starts multiple devices and executes a test command on each in parallel.
+    Starts several Android emulators or iOS simulators concurrently.
 
     Args:
-        device_names (str): Comma-separated list of AVD names (Android) or Simulator names (iOS).
+        device_names (str): Comma-separated list of AVD names (Android) or Simulator names/UUIDs (iOS).
         platform_name (str): 'Android' or 'iOS'.
-        test_command_pattern (str): Command to run. Use '{udid}' as placeholder for Device ID.
-                                    Example: "mvn test -Dudid={udid} -DplatformName=Android"
 
     Returns:
-        str: A report of the execution status for each device.
+        str: The start result for each device.
     """
     device_list = [d.strip() for d in device_names.split(',') if d.strip()]
     if not device_list:
         return "Error: No devices specified."
 
+    if platform_name.lower() == 'android':
+        start_one = start_android_emulator
+    elif platform_name.lower() == 'ios':
+        start_one = start_ios_simulator
+    else:
+        return f"Error: Unsupported platform '{platform_name}'."
+
+    with ThreadPoolExecutor(max_workers=min(len(device_list), 8)) as executor:
+        results = list(executor.map(start_one, device_list))
+    return "\n".join(results)
+
+
+_EMULATOR_BOOT_TIMEOUT = 90
+_SIMULATOR_BOOT_TIMEOUT = 90
+
+
+def _running_emulators(adb_bin):
+    """
+    Lists the running emulators.
+
+    Returns:
+        tuple: (running, serials) where running maps each AVD name to its adb serial, and
+               serials holds every emulator serial adb lists, including ones whose name
+               lookup failed (they still hold their console port).
+    """
+    devices = tracked_adb_devices()
+    if devices is None:
+        devices = parse_adb_devices(subprocess.run([adb_bin, "devices"], capture_output=True).stdout)
+
+    running = {}
+    serials = [serial for serial, _ in devices if serial.startswith("emulator-")]
+    for serial in serials:
+        try:
+            res = subprocess.run([adb_bin, "-s", serial, "emu", "avd", "name"], capture_output=True, timeout=2)
+        except subprocess.TimeoutExpired:
+            continue
+        lines = res.stdout.decode("utf-8", "replace").splitlines()
+        if lines:
+            running[lines[0].strip()] = serial
+    return running, serials
+
+
+def _wait_for_emulators(adb_bin, procs):
+    """
+    Waits until each launched emulator reports sys.boot_completed.
+
+    Each tick takes one device listing (from the adb watcher, or a single `adb devices`)
+    and only queries getprop on pending serials that adb already reports as online. An
+    emulator whose process exits (e.g. unknown or locked AVD) stops being waited for.
+
+    Args:
+        adb_bin (str): Path to the adb binary.
+        procs (dict): Maps each emulator serial to its emulator Popen handle.
+
+    Returns:
+        set: The serials that finished booting before _EMULATOR_BOOT_TIMEOUT.
+    """
+    pending = set(procs)
+    booted = set()
+    deadline = time.monotonic() + _EMULATOR_BOOT_TIMEOUT
+    while pending and time.monotonic() < deadline:
+        devices = tracked_adb_devices()
+        if devices is None:
+            devices = parse_adb_devices(subprocess.run([adb_bin, "devices"], capture_output=True).stdout)
+        for serial in [serial for serial, state in devices if state == "device" and serial in pending]:
+            try:
+                res = subprocess.run([adb_bin, "-s", serial, "shell", "getprop", "sys.boot_completed"], capture_output=True, timeout=2)
+                if res.stdout.strip() == b"1":
+                    pending.discard(serial)
+                    booted.add(serial)
+            except subprocess.TimeoutExpired:
+                pass
+        pending = {serial for serial in pending if procs[serial].poll() is None}
+        if pending:
+            time.sleep(1)
+    return booted
+
+
+def _testing_set_udid(name_or_uuid):
+    """
+    Finds a simulator in the `testing` device set, creating it from the default set if needed.
+
+    The copy gets the same device type and runtime as the default-set simulator of that
+    name or UUID. Returns its UDID, or None if no such simulator exists.
+    """
+    res = subprocess.run(["xcrun", "simctl", "--set", "testing", "list", "devices", "available", "-j"], capture_output=True)
+    try:
+        testing = json_loads(res.stdout)
+    except ValueError:
+        testing = {}
+    for devices in testing.get("devices", {}).values():
+        for device in devices:
+            if name_or_uuid in (device['name'], device['udid']):
+                return device['udid']
+
+    data, _ = simctl_devices()
+    for runtime, devices in data.get("devices", {}).items():
+        for device in devices:
+            if name_or_uuid in (device['name'], device['udid']):
+                cmd = ["xcrun", "simctl", "--set", "testing", "create", device['name'], device['deviceTypeIdentifier'], runtime]
+                res = subprocess.run(cmd, capture_output=True)
+                return res.stdout.decode("utf-8", "replace").strip() if res.returncode == 0 else None
+    return None
+
+
+def _boot_parallel_devices(device_list, platform_name, use_testing_set=False):
+    """
+    Boots the devices for `run_parallel_tests` and waits until they are ready.
+
+    Returns:
+        tuple or str: (started_udids, boot_failures), or an error message.
+    """
     started_udids = []
+    boot_failures = []
     
     if platform_name.lower() == 'android':
-        # 1. Start Emulators
-        sdk_root = get_android_sdk_root()
-        emulator_bin = shutil.which("emulator")
-        if not emulator_bin and sdk_root:
-             emulator_bin = os.path.join(sdk_root, "emulator", "emulator")
-        
-        if not emulator_bin: return "Error: Emulator binary not found."
-
-        print(f"Starting {len(device_list)} Android emulators...")
-        for avd in device_list:
-            subprocess.Popen([emulator_bin, "@" + avd], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        # 2. Wait for boot (simple sleep for now, could be smarter)
-        print("Waiting 45s for emulators to boot...")
-        time.sleep(45)
-
-        # 3. Get connected devices
-        adb_bin = shutil.which("adb")
-        if not adb_bin and sdk_root:
-            adb_bin = os.path.join(sdk_root, "platform-tools", "adb")
-            
-        if adb_bin:
-            res = subprocess.run([adb_bin, "devices"], capture_output=True, text=True)
-            lines = res.stdout.strip().split('\n')[1:]
-            for line in lines:
-                if "\tdevice" in line:
-                    started_udids.append(line.split('\t')[0])
+        emulator_bin = resolve_android_bin("emulator")
+        if not emulator_bin: return missing_android_bin_error("Emulator")
+        adb_bin = resolve_android_bin("adb")
+        if not adb_bin: return missing_android_bin_error("ADB")
+
+        # 1. Reuse AVDs that are already running; give each new one its own console port so
+        #    its adb serial (emulator-<port>) is known up front
+        running, emulator_serials = _running_emulators(adb_bin)
+        to_boot = [avd for avd in device_list if avd not in running]
+        started_udids.extend(running[avd] for avd in device_list if avd in running)
+        used_ports = {int(serial.split("-")[1]) for serial in emulator_serials if serial.split("-")[1].isdigit()}
+        free_ports = [p for p in range(5554, 5586, 2) if p not in used_ports]
+        if len(free_ports) < len(to_boot):
+            return "Error: Not enough free emulator ports to boot all devices."
+
+        # 2. Launch them all, then wait for every one to finish booting
+        print(f"Starting {len(to_boot)} Android emulators...", file=sys.stderr)
+        serials = [f"emulator-{port}" for port in free_ports[:len(to_boot)]]
+        procs = {}
+        for avd, serial, port in zip(to_boot, serials, free_ports):
+            procs[serial] = subprocess.Popen(
+                [emulator_bin, "@" + avd, "-port", str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **_DETACHED
+            )
+        booted = _wait_for_emulators(adb_bin, procs)
+        for avd, serial in zip(to_boot, serials):
+            if serial in booted:
+                started_udids.append(serial)
+            else:
+                boot_failures.append(avd)
         
     elif platform_name.lower() == 'ios':
         if not is_mac(): return "Error: iOS requires macOS."
         
-        # 1. Resolve Names to UUIDs and Boot
-        cmd = ["xcrun", "simctl", "list", "devices", "available", "-j"]
-        res = subprocess.run(cmd, capture_output=True, text=True)
-        data = json.loads(res.stdout)
-        
-        # Flatten the list
-        available_sims = {}
-        for runtime, devices in data.get("devices", {}).items():
-            for d in devices:
-                available_sims[d['name']] = d['udid']
-        
+        simctl = ["xcrun", "simctl"]
+        if use_testing_set:
+            simctl += ["--set", "testing"]
+
+        # 1. Resolve Names to UUIDs using the shared simctl listing
+        if not use_testing_set:
+            _, available_sims = simctl_devices()
+
+        udids = []
         for name in device_list:
-            udid = available_sims.get(name)
+            udid = _testing_set_udid(name) if use_testing_set else available_sims.get(name)
             if not udid:
                 # Maybe the user passed a UUID
-                if "-" in name and len(name) > 20: 
+                if "-" in name and len(name) > 20 and not use_testing_set:
                     udid = name
                 else:
                     return f"Error: Simulator '{name}' not found."
-            
-            subprocess.run(["xcrun", "simctl", "boot", udid], check=False)
-            started_udids.append(udid)
-            
-        # Wait a bit for boot
-        time.sleep(10)
+            udids.append(udid)
+
+        # 2. Boot concurrently; `bootstatus -b` boots if needed and blocks until the simulator is ready
+        def boot(udid):
+            try:
+                return subprocess.run(simctl + ["bootstatus", udid, "-b"], capture_output=True, timeout=_SIMULATOR_BOOT_TIMEOUT).returncode == 0
+            except subprocess.TimeoutExpired:
+                return False
+
+        with ThreadPoolExecutor(max_workers=len(udids)) as executor:
+            results = list(executor.map(boot, udids))
+        for udid, ok in zip(udids, results):
+            if ok:
+                started_udids.append(udid)
+            else:
+                boot_failures.append(udid)
+        _SIM_CACHE["ts"] = 0  # Simulator state changed; force a fresh listing
+
+    return started_udids, boot_failures
+
+
+@mcp.tool()
+async def run_parallel_tests(device_names: str, platform_name: str, test_command_pattern: str,
+                             use_testing_set: bool = False):
+    """
+    Starts multiple devices and executes a test command on each in parallel.
+
+    Args:
+        device_names (str): Comma-separated list of AVD names (Android) or Simulator names (iOS).
+        platform_name (str): 'Android' or 'iOS'.
+        test_command_pattern (str): Command to run. Use '{udid}' as placeholder for Device ID.
+                                    Example: "mvn test -Dudid={udid} -DplatformName=Android"
+                                    The command runs without a shell, so wrap it in `sh -c "..."` if it
+                                    needs pipes, redirection or variable expansion.
+        use_testing_set (bool, optional): (iOS only) Boot simulators from the isolated `testing` device set,
+                                          which avoids Xcode's limit on concurrent simulators and state leaking
+                                          between runs. Missing simulators are created there from the default
+                                          set, and the tests must pass `appium:simulatorDevicesSetPath` pointing
+                                          to ~/Library/Developer/XCTestDevices. Defaults to False.
+
+    Returns:
+        str: A report of the execution status for each device.
+    """
+    device_list = [d.strip() for d in device_names.split(',') if d.strip()]
+    if not device_list:
+        return "Error: No devices specified."
+
+    # Split once and exec the argv directly instead of going through a shell per device.
+    # Windows needs cmd.exe to resolve extension-less launchers such as `mvn` (mvn.cmd).
+    try:
+        argv_template = shlex.split(test_command_pattern, posix=not _IS_WINDOWS)
+    except ValueError as e:
+        return f"Error: Could not parse test command: {str(e)}"
+    if _IS_WINDOWS:
+        argv_template = [a[1:-1] if len(a) > 1 and a[0] == a[-1] == '"' else a for a in argv_template]
+    use_shell = not argv_template or (_IS_WINDOWS and not os.path.splitext(argv_template[0])[1])
+
+    # Booting blocks on subprocesses and polling, so keep it off the server's event loop
+    booted = await asyncio.to_thread(_boot_parallel_devices, device_list, platform_name, use_testing_set)
+    if isinstance(booted, str):
+        return booted
+    started_udids, boot_failures = booted
 
     if not started_udids:
+        if boot_failures:
+            return f"Error: Devices failed to boot: {', '.join(boot_failures)}"
         return "Error: No devices available to run tests."
 
-    # 4. Run Tests in Parallel
-    processes = []
-    
-    print(f"Running tests on: {started_udids}")
-    
-    for udid in started_udids:
-        # Replace placeholder
-        cmd_str = test_command_pattern.replace("{udid}", udid)
-        # Run command
-        p = subprocess.Popen(cmd_str, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        processes.append((udid, p))
-
-    # 5. Collect Results
-    output_report = "Parallel Execution Results:\n"
-    for udid, p in processes:
-        stdout, stderr = p.communicate()
-        status = "PASSED" if p.returncode == 0 else "FAILED"
-        output_report += f"\nDevice: {udid} | Status: {status}\n"
-        output_report += f"Command: {test_command_pattern.replace('{udid}', udid)}\n"
-        if p.returncode != 0:
-            output_report += f"Error Output: {stderr[:200]}...\n"
-            
-    return output_report
+    # 3. Run Tests in Parallel, draining every process's output concurrently so a
+    #    chatty test run cannot stall on a full pipe while another one is collected
+    print(f"Running tests on: {started_udids}", file=sys.stderr)
+
+    async def run_one(udid):
+        pipes = {"stdout": asyncio.subprocess.PIPE, "stderr": asyncio.subprocess.PIPE}
+        try:
+            if use_shell:
+                proc = await asyncio.create_subprocess_shell(test_command_pattern.replace("{udid}", udid), **pipes)
+            else:
+                proc = await asyncio.create_subprocess_exec(*[a.replace("{udid}", udid) for a in argv_template], **pipes)
+        except OSError as e:
+            return 127, str(e)
+        _, stderr = await proc.communicate()
+        return proc.returncode, stderr.decode("utf-8", "replace")
+
+    results = await asyncio.gather(*(run_one(udid) for udid in started_udids))
+
+    # 4. Collect Results
+    report = ["Parallel Execution Results:"]
+    for udid, (returncode, stderr) in zip(started_udids, results):
+        status = "PASSED" if returncode == 0 else "FAILED"
+        report.append(f"\nDevice: {udid} | Status: {status}")
+        report.append(f"Command: {test_command_pattern.replace('{udid}', udid)}")
+        if returncode != 0:
+            report.append(f"Error Output: {stderr[:200]}...")
+    for device in boot_failures:
+        report.append(f"\nDevice: {device} | Status: BOOT FAILED")
+
+    return "\n".join(report) + "\n"
 
 
 if __name__ == "__main__":